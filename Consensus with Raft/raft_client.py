@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# raft_client.py
+# demo_client.py-style workload against the native Raft nodes in raft_node.py:
+# write keys, read them back, then measure write throughput.
+import argparse, time, threading
+import requests
+from colorama import Fore, Style, init
+
+# initialize colorama
+init(autoreset=True)
+
+# the three local raft_node.py endpoints started by run_raft_local.sh
+ENDPOINTS = [
+    'http://127.0.0.1:6001',
+    'http://127.0.0.1:6002',
+    'http://127.0.0.1:6003',
+]
+
+def find_leader(endpoints):
+    """Ask each endpoint for its status, return the leader's URL."""
+    for url in endpoints:
+        try:
+            status = requests.get(f"{url}/status", timeout=2).json()
+        except requests.exceptions.RequestException as e:
+            print(f"{Fore.RED}✗ {url} → {e.__class__.__name__}{Style.RESET_ALL}")
+            continue
+        if status["state"] == "leader":
+            print(f"{Fore.GREEN}→ Leader is {url} (term {status['term']}){Style.RESET_ALL}")
+            return url
+        if status["leader"]:
+            print(f"{Fore.GREEN}→ {url} points at leader {status['leader']}{Style.RESET_ALL}")
+            return status["leader"]
+    raise RuntimeError("No Raft leader found")
+
+def put(session, leader, key, value):
+    response = session.post(f"{leader}/put", json={"key": key, "value": value}, timeout=10)
+    return response.status_code == 200
+
+def write_key(session, leader, key, value):
+    print(f"{Fore.GREEN}[WRITE]{Style.RESET_ALL} {key} → {Fore.CYAN}{value}{Style.RESET_ALL}")
+    if not put(session, leader, key, value):
+        print(f"{Fore.RED}        write was not committed{Style.RESET_ALL}")
+
+def read_key(session, leader, key):
+    val = session.get(f"{leader}/get", params={"key": key}, timeout=5).json().get("value")
+    print(f"{Fore.YELLOW}[READ]{Style.RESET_ALL} {key} = {Fore.MAGENTA}{val or ''}{Style.RESET_ALL}")
+
+def benchmark(leader, ops, concurrency, payload):
+    """Issue `ops` committed writes from `concurrency` client threads."""
+    value = 'x' * payload
+    latencies, failures = [], [0]
+    lock = threading.Lock()
+
+    def worker(worker_id):
+        session = requests.Session()
+        for i in range(worker_id, ops, concurrency):
+            start = time.perf_counter()
+            ok = put(session, leader, f"bench{i}", value)
+            elapsed = time.perf_counter() - start
+            with lock:
+                if ok:
+                    latencies.append(elapsed)
+                else:
+                    failures[0] += 1
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(w,)) for w in range(concurrency)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    duration = time.perf_counter() - started
+
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] * 1000 if latencies else 0
+    p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000 if latencies else 0
+    print(f"{Fore.CYAN}{len(latencies)} writes in {duration:.2f}s → {len(latencies) / duration:.0f} ops/s, "
+          f"p50 {p50:.1f}ms, p99 {p99:.1f}ms, {failures[0]} failed{Style.RESET_ALL}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--endpoints', default=','.join(ENDPOINTS))
+    parser.add_argument('--ops', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--payload', type=int, default=16)
+    args = parser.parse_args()
+
+    print(f"\n{Fore.BLUE}>>> Finding the leader…{Style.RESET_ALL}")
+    leader = find_leader(args.endpoints.split(','))
+    session = requests.Session()
+
+    print(f"\n{Fore.BLUE}>>> Writing 5 keys…{Style.RESET_ALL}")
+    for i in range(1, 6):
+        write_key(session, leader, f"foo{i}", f"bar{i}")
+
+    print(f"\n{Fore.BLUE}>>> Reading them back…{Style.RESET_ALL}")
+    for i in range(1, 6):
+        read_key(session, leader, f"foo{i}")
+
+    print(f"\n{Fore.BLUE}>>> Benchmark: {args.ops} writes, {args.concurrency} clients, {args.payload}B values…{Style.RESET_ALL}")
+    benchmark(leader, args.ops, args.concurrency, args.payload)
+
+    print(f"\n{Fore.BLUE}>>> Demo complete.{Style.RESET_ALL}\n")
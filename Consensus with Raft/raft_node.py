@@ -0,0 +1,568 @@
+#!/usr/bin/env python3
+# raft_node.py
+# A native, in-process Raft node: leader election, batched and pipelined
+# AppendEntries with per-follower flow control, and snapshot-based log
+# compaction. Peers are passed on the command line, like the PBFT nodes:
+#
+#   NODE_ID=1 PORT=6001 python raft_node.py http://127.0.0.1:6002 http://127.0.0.1:6003
+
+import os
+import sys
+import time
+import random
+import threading
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from flask import Flask, request, jsonify
+
+# --- Configuration ---
+app = Flask(__name__)
+
+NODE_ID = os.environ.get('NODE_ID', '0')
+PORT = int(os.environ.get('PORT', 5000))
+SELF_URL = os.environ.get('SELF_URL', f"http://127.0.0.1:{PORT}")
+
+# Every other node in the cluster, as base URLs
+PEERS = sys.argv[1:]
+CLUSTER_SIZE = len(PEERS) + 1
+MAJORITY = CLUSTER_SIZE // 2 + 1
+
+# Timing (seconds)
+HEARTBEAT_INTERVAL = float(os.environ.get('HEARTBEAT_INTERVAL', 0.05))
+ELECTION_TIMEOUT_MIN = float(os.environ.get('ELECTION_TIMEOUT_MIN', 0.3))
+ELECTION_TIMEOUT_MAX = float(os.environ.get('ELECTION_TIMEOUT_MAX', 0.6))
+RPC_TIMEOUT = float(os.environ.get('RPC_TIMEOUT', 1.0))
+COMMIT_TIMEOUT = float(os.environ.get('COMMIT_TIMEOUT', 5.0))
+
+# Replication / flow control
+MAX_BATCH = int(os.environ.get('MAX_BATCH', 256))        # entries per AppendEntries
+MAX_INFLIGHT = int(os.environ.get('MAX_INFLIGHT', 4))    # pipelined batches per follower
+# Pipelined batches travel on different connections and can overtake each
+# other; a follower holds a batch that arrives ahead of its predecessor this
+# long, waiting for the gap to fill, before rejecting it.
+REORDER_TIMEOUT = float(os.environ.get('REORDER_TIMEOUT', 0.1))
+
+# Log compaction: snapshot once this many applied entries sit in the log
+SNAPSHOT_THRESHOLD = int(os.environ.get('SNAPSHOT_THRESHOLD', 1000))
+
+FOLLOWER, CANDIDATE, LEADER = 'follower', 'candidate', 'leader'
+
+# Per-follower replication states (as in etcd's Progress):
+#   probe     - one batch at a time until we find where the logs match
+#   replicate - logs match, pipeline up to MAX_INFLIGHT batches
+#   snapshot  - an InstallSnapshot is outstanding, send nothing else
+PROBE, REPLICATE, SNAPSHOT = 'probe', 'replicate', 'snapshot'
+
+_local = threading.local()
+
+
+# --- Helper Functions ---
+def print_log(message):
+    """Prints a formatted log message."""
+    print(f"[Raft {NODE_ID}]: {message}", flush=True)
+
+def post(peer, endpoint, message):
+    """POSTs a message to a peer using a per-thread keep-alive session."""
+    session = getattr(_local, 'session', None)
+    if session is None:
+        session = _local.session = requests.Session()
+    response = session.post(f"{peer}{endpoint}", json=message, timeout=RPC_TIMEOUT)
+    return response.json()
+
+
+class Progress:
+    """The leader's view of one follower's log."""
+
+    def __init__(self, next_index):
+        self.next_index = next_index
+        self.match_index = 0
+        self.state = PROBE
+        self.inflight = 0
+        # Bumped whenever the pipeline is reset so replies to batches sent
+        # before the reset are not used to move next_index around.
+        self.generation = 0
+        self.last_sent = 0.0
+        self.paused_until = 0.0
+
+    def window(self):
+        if self.state == REPLICATE:
+            return MAX_INFLIGHT
+        if self.state == PROBE:
+            return 1
+        return 0
+
+    def reset(self, next_index, state=PROBE):
+        self.next_index = max(next_index, self.match_index + 1)
+        self.state = state
+        self.inflight = 0
+        self.generation += 1
+
+    def as_dict(self):
+        return {
+            "next_index": self.next_index,
+            "match_index": self.match_index,
+            "state": self.state,
+            "inflight": self.inflight,
+        }
+
+
+class RaftNode:
+    def __init__(self, node_id, self_url, peers):
+        self.node_id = node_id
+        self.self_url = self_url
+        self.peers = peers
+
+        # Persistent state (kept in memory for this lab)
+        self.current_term = 0
+        self.voted_for = None
+        # log[i] holds the entry at index snapshot_index + 1 + i
+        self.log = []
+
+        # Compaction state
+        self.snapshot_index = 0
+        self.snapshot_term = 0
+        self.snapshot_data = {}
+
+        # Volatile state
+        self.state = FOLLOWER
+        self.leader_url = None
+        self.commit_index = 0
+        self.last_applied = 0
+        self.kv = {}
+        self.election_deadline = self._next_deadline()
+
+        # Leader state
+        self.progress = {}
+
+        self.lock = threading.Lock()
+        self.applied = threading.Condition(self.lock)
+        self.replicate = threading.Condition(self.lock)
+        self.appended = threading.Condition(self.lock)
+        self.executor = ThreadPoolExecutor(max_workers=max(4, len(peers) * (MAX_INFLIGHT + 1)))
+
+    # --- Log helpers (caller holds the lock) ---
+    def last_index(self):
+        return self.snapshot_index + len(self.log)
+
+    def last_term(self):
+        return self.log[-1]["term"] if self.log else self.snapshot_term
+
+    def term_at(self, index):
+        if index == self.snapshot_index:
+            return self.snapshot_term
+        if index < self.snapshot_index or index > self.last_index():
+            return None
+        return self.log[index - self.snapshot_index - 1]["term"]
+
+    def entries_from(self, index, limit):
+        start = index - self.snapshot_index - 1
+        return self.log[start:start + limit]
+
+    def _next_deadline(self):
+        return time.monotonic() + random.uniform(ELECTION_TIMEOUT_MIN, ELECTION_TIMEOUT_MAX)
+
+    def _become_follower(self, term):
+        if term > self.current_term:
+            self.current_term = term
+            self.voted_for = None
+        if self.state != FOLLOWER:
+            print_log(f"Stepping down to follower in term {self.current_term}.")
+        self.state = FOLLOWER
+        self.progress = {}
+        self.election_deadline = self._next_deadline()
+        self.replicate.notify_all()
+        self.applied.notify_all()
+
+    # --- State machine ---
+    def _apply_committed(self):
+        """Applies committed entries to the key-value store, then compacts."""
+        while self.last_applied < self.commit_index:
+            self.last_applied += 1
+            command = self.log[self.last_applied - self.snapshot_index - 1]["command"]
+            if command.get("op") == "set":
+                self.kv[command["key"]] = command["value"]
+        self.applied.notify_all()
+
+        if self.last_applied - self.snapshot_index >= SNAPSHOT_THRESHOLD:
+            self._take_snapshot()
+
+    def _take_snapshot(self):
+        """Replaces the applied prefix of the log with a copy of the store."""
+        new_index = self.last_applied
+        self.snapshot_term = self.term_at(new_index)
+        self.log = self.log[new_index - self.snapshot_index:]
+        self.snapshot_index = new_index
+        self.snapshot_data = dict(self.kv)
+        print_log(f"Compacted log through index {new_index} (term {self.snapshot_term}).")
+
+    # --- Election ---
+    def run_ticker(self):
+        """Starts an election whenever the election timeout lapses."""
+        while True:
+            time.sleep(0.01)
+            with self.lock:
+                if self.state == LEADER or time.monotonic() < self.election_deadline:
+                    continue
+                self._start_election()
+
+    def _start_election(self):
+        self.state = CANDIDATE
+        self.current_term += 1
+        self.voted_for = self.self_url
+        self.leader_url = None
+        self.election_deadline = self._next_deadline()
+        term = self.current_term
+        votes = {self.self_url}
+        print_log(f"Election timeout. Starting election for term {term}.")
+
+        if len(votes) >= MAJORITY:
+            self._become_leader()
+            return
+
+        message = {
+            "term": term,
+            "candidate": self.self_url,
+            "last_log_index": self.last_index(),
+            "last_log_term": self.last_term(),
+        }
+        for peer in self.peers:
+            self.executor.submit(self._request_vote, peer, message, votes)
+
+    def _request_vote(self, peer, message, votes):
+        try:
+            reply = post(peer, '/request_vote', message)
+        except (requests.exceptions.RequestException, ValueError):
+            return
+        with self.lock:
+            if reply["term"] > self.current_term:
+                self._become_follower(reply["term"])
+                return
+            if self.state != CANDIDATE or self.current_term != message["term"]:
+                return
+            if reply.get("vote_granted"):
+                votes.add(peer)
+                if len(votes) >= MAJORITY:
+                    self._become_leader()
+
+    def handle_request_vote(self, message):
+        with self.lock:
+            if message["term"] > self.current_term:
+                self._become_follower(message["term"])
+
+            up_to_date = (message["last_log_term"], message["last_log_index"]) >= (self.last_term(), self.last_index())
+            granted = (
+                message["term"] == self.current_term
+                and self.voted_for in (None, message["candidate"])
+                and up_to_date
+            )
+            if granted:
+                self.voted_for = message["candidate"]
+                self.election_deadline = self._next_deadline()
+            return {"term": self.current_term, "vote_granted": granted}
+
+    def _become_leader(self):
+        self.state = LEADER
+        self.leader_url = self.self_url
+        print_log(f"Won election for term {self.current_term}. I am the leader.")
+
+        self.progress = {peer: Progress(self.last_index() + 1) for peer in self.peers}
+        # A no-op from the new term lets earlier entries commit (Raft §5.4.2)
+        self._append({"op": "noop"})
+        for peer in self.peers:
+            threading.Thread(target=self.run_replicator, args=(peer, self.current_term), daemon=True).start()
+
+    # --- Leader: appending and replicating ---
+    def _append(self, command):
+        self.log.append({"term": self.current_term, "command": command})
+        index = self.last_index()
+        self._advance_commit()
+        self.replicate.notify_all()
+        return index
+
+    def _advance_commit(self):
+        matches = sorted([p.match_index for p in self.progress.values()] + [self.last_index()], reverse=True)
+        candidate = matches[MAJORITY - 1]
+        # Only entries from the current term are committed by counting replicas
+        if candidate > self.commit_index and self.term_at(candidate) == self.current_term:
+            self.commit_index = candidate
+            self._apply_committed()
+
+    def run_replicator(self, peer, term):
+        """Feeds one follower batches of entries, pipelined up to its window."""
+        while True:
+            with self.lock:
+                while True:
+                    if self.state != LEADER or self.current_term != term:
+                        return
+                    progress = self.progress[peer]
+                    now = time.monotonic()
+                    pending = self.last_index() - progress.next_index + 1
+                    # Pipeline another batch only when a full one is waiting;
+                    # otherwise let entries pile up behind the batch in flight
+                    # so they go out together in fewer, larger requests.
+                    has_entries = pending > 0 and (progress.inflight == 0 or pending >= MAX_BATCH)
+                    heartbeat_due = now - progress.last_sent >= HEARTBEAT_INTERVAL
+                    if now >= progress.paused_until and progress.inflight < progress.window():
+                        if has_entries or heartbeat_due:
+                            break
+                    elif heartbeat_due and progress.inflight == 0:
+                        break
+                    self.replicate.wait(timeout=HEARTBEAT_INTERVAL / 2)
+
+                progress.last_sent = now
+                if progress.next_index <= self.snapshot_index:
+                    message = {
+                        "term": term,
+                        "leader": self.self_url,
+                        "last_included_index": self.snapshot_index,
+                        "last_included_term": self.snapshot_term,
+                        "data": self.snapshot_data,
+                    }
+                    progress.state = SNAPSHOT
+                    progress.inflight = 1
+                    self.executor.submit(self._send_snapshot, peer, message, progress.generation)
+                    continue
+
+                prev_index = progress.next_index - 1
+                entries = self.entries_from(progress.next_index, MAX_BATCH) if progress.inflight < progress.window() else []
+                message = {
+                    "term": term,
+                    "leader": self.self_url,
+                    "prev_log_index": prev_index,
+                    "prev_log_term": self.term_at(prev_index),
+                    "entries": entries,
+                    "leader_commit": self.commit_index,
+                }
+                progress.next_index += len(entries)
+                progress.inflight += 1
+                self.executor.submit(self._send_append, peer, message, progress.generation)
+
+    def _send_append(self, peer, message, generation):
+        try:
+            reply = post(peer, '/append_entries', message)
+        except (requests.exceptions.RequestException, ValueError):
+            reply = None
+
+        with self.lock:
+            if reply is not None and reply["term"] > self.current_term:
+                self._become_follower(reply["term"])
+                return
+            if self.state != LEADER or self.current_term != message["term"]:
+                return
+            progress = self.progress[peer]
+            stale = generation != progress.generation
+
+            if reply is None:
+                if not stale:
+                    progress.reset(progress.match_index + 1)
+                    progress.paused_until = time.monotonic() + HEARTBEAT_INTERVAL
+            elif reply["success"]:
+                # A success is always safe to count, even from an older pipeline
+                match = message["prev_log_index"] + len(message["entries"])
+                if match > progress.match_index:
+                    progress.match_index = match
+                    self._advance_commit()
+                if not stale:
+                    progress.inflight -= 1
+                    if progress.state == PROBE:
+                        progress.state = REPLICATE
+            elif not stale:
+                progress.reset(reply.get("conflict_index", progress.match_index + 1))
+            self.replicate.notify_all()
+
+    def _send_snapshot(self, peer, message, generation):
+        try:
+            reply = post(peer, '/install_snapshot', message)
+        except (requests.exceptions.RequestException, ValueError):
+            reply = None
+
+        with self.lock:
+            if reply is not None and reply["term"] > self.current_term:
+                self._become_follower(reply["term"])
+                return
+            if self.state != LEADER or self.current_term != message["term"]:
+                return
+            progress = self.progress[peer]
+            if generation != progress.generation:
+                return
+            if reply is None:
+                progress.reset(progress.next_index)
+                progress.paused_until = time.monotonic() + HEARTBEAT_INTERVAL
+            else:
+                progress.match_index = max(progress.match_index, message["last_included_index"])
+                progress.reset(message["last_included_index"] + 1, REPLICATE)
+                self._advance_commit()
+            self.replicate.notify_all()
+
+    # --- Follower: receiving entries and snapshots ---
+    def handle_append_entries(self, message):
+        with self.lock:
+            if message["term"] < self.current_term:
+                return {"term": self.current_term, "success": False}
+            if message["term"] > self.current_term or self.state != FOLLOWER:
+                self._become_follower(message["term"])
+            self.leader_url = message["leader"]
+            self.election_deadline = self._next_deadline()
+
+            prev_index = message["prev_log_index"]
+            entries = message["entries"]
+
+            # An earlier batch of the pipeline may still be on its way. Wait
+            # for it instead of rejecting, which would make the leader reset
+            # its whole pipeline to this follower.
+            deadline = time.monotonic() + REORDER_TIMEOUT
+            while prev_index > self.last_index() and message["term"] == self.current_term:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self.appended.wait(timeout=remaining)
+            if message["term"] < self.current_term:
+                return {"term": self.current_term, "success": False}
+
+            if prev_index > self.last_index():
+                return {"term": self.current_term, "success": False, "conflict_index": self.last_index() + 1}
+
+            if prev_index < self.snapshot_index:
+                # Everything up to the snapshot is committed and therefore matches
+                skip = self.snapshot_index - prev_index
+                entries = entries[skip:]
+                prev_index = self.snapshot_index
+            elif self.term_at(prev_index) != message["prev_log_term"]:
+                # Skip back over the whole conflicting term in one round trip
+                conflict_term = self.term_at(prev_index)
+                conflict_index = prev_index
+                while conflict_index - 1 > self.snapshot_index and self.term_at(conflict_index - 1) == conflict_term:
+                    conflict_index -= 1
+                return {"term": self.current_term, "success": False, "conflict_index": conflict_index}
+
+            for offset, entry in enumerate(entries):
+                index = prev_index + 1 + offset
+                if index > self.last_index():
+                    self.log.extend(entries[offset:])
+                    break
+                if self.term_at(index) != entry["term"]:
+                    # Truncate only on a real conflict; a late, older batch
+                    # must not cut off entries a newer batch already added.
+                    del self.log[index - self.snapshot_index - 1:]
+                    self.log.extend(entries[offset:])
+                    break
+            self.appended.notify_all()
+
+            if message["leader_commit"] > self.commit_index:
+                # A late, older batch may cover less than we already know is
+                # committed, so commit_index only ever moves forward.
+                self.commit_index = max(self.commit_index, min(message["leader_commit"], prev_index + len(entries)))
+                self._apply_committed()
+            return {"term": self.current_term, "success": True}
+
+    def handle_install_snapshot(self, message):
+        with self.lock:
+            if message["term"] < self.current_term:
+                return {"term": self.current_term}
+            if message["term"] > self.current_term or self.state != FOLLOWER:
+                self._become_follower(message["term"])
+            self.leader_url = message["leader"]
+            self.election_deadline = self._next_deadline()
+
+            index = message["last_included_index"]
+            if index <= self.commit_index:
+                return {"term": self.current_term}
+
+            if self.term_at(index) == message["last_included_term"]:
+                self.log = self.log[index - self.snapshot_index:]
+            else:
+                self.log = []
+            self.snapshot_index = index
+            self.snapshot_term = message["last_included_term"]
+            self.snapshot_data = message["data"]
+            self.kv = dict(message["data"])
+            self.commit_index = self.last_applied = index
+            self.appended.notify_all()
+            print_log(f"Installed snapshot through index {index} from {self.leader_url}.")
+            return {"term": self.current_term}
+
+    # --- Client operations ---
+    def submit(self, command):
+        """Appends a command on the leader and waits until it is applied."""
+        with self.lock:
+            if self.state != LEADER:
+                return None, self.leader_url
+            term = self.current_term
+            index = self._append(command)
+            deadline = time.monotonic() + COMMIT_TIMEOUT
+            while self.last_applied < index:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or self.current_term != term or self.state != LEADER:
+                    return False, self.leader_url
+                self.applied.wait(timeout=remaining)
+            # The entry at index may have been replaced by a new leader's log.
+            # Once compacted its term is gone, so only trust it if we never
+            # lost leadership since appending it.
+            entry_term = self.term_at(index)
+            if entry_term is None:
+                return self.current_term == term and self.state == LEADER, self.leader_url
+            return entry_term == term, self.leader_url
+
+    def status(self):
+        with self.lock:
+            return {
+                "node_id": self.node_id,
+                "url": self.self_url,
+                "state": self.state,
+                "term": self.current_term,
+                "leader": self.leader_url,
+                "commit_index": self.commit_index,
+                "last_applied": self.last_applied,
+                "last_index": self.last_index(),
+                "snapshot_index": self.snapshot_index,
+                "log_length": len(self.log),
+                "keys": len(self.kv),
+                "progress": {peer: p.as_dict() for peer, p in self.progress.items()},
+            }
+
+
+raft_node = RaftNode(NODE_ID, SELF_URL, PEERS)
+
+
+# --- Flask API Endpoints ---
+@app.route('/put', methods=['POST'])
+def put_endpoint():
+    data = request.json
+    if data.get('key') is None: return jsonify({"error": "Key is required"}), 400
+
+    committed, leader = raft_node.submit({"op": "set", "key": data['key'], "value": data.get('value')})
+    if committed is None:
+        return jsonify({"error": "I am not the leader", "leader": leader}), 421
+    if not committed:
+        return jsonify({"error": "Entry was not committed", "leader": leader}), 503
+    return jsonify({"status": "committed"})
+
+@app.route('/get', methods=['GET'])
+def get_endpoint():
+    key = request.args.get('key')
+    with raft_node.lock:
+        if raft_node.state != LEADER:
+            return jsonify({"error": "I am not the leader", "leader": raft_node.leader_url}), 421
+        # Served from the leader's applied state; not a full ReadIndex read.
+        return jsonify({"key": key, "value": raft_node.kv.get(key)})
+
+@app.route('/request_vote', methods=['POST'])
+def request_vote_endpoint():
+    return jsonify(raft_node.handle_request_vote(request.json))
+
+@app.route('/append_entries', methods=['POST'])
+def append_entries_endpoint():
+    return jsonify(raft_node.handle_append_entries(request.json))
+
+@app.route('/install_snapshot', methods=['POST'])
+def install_snapshot_endpoint():
+    return jsonify(raft_node.handle_install_snapshot(request.json))
+
+@app.route('/status', methods=['GET'])
+def status_endpoint():
+    return jsonify(raft_node.status())
+
+if __name__ == '__main__':
+    print_log(f"Starting Raft node at {SELF_URL}. N={CLUSTER_SIZE}, majority={MAJORITY}")
+    threading.Thread(target=raft_node.run_ticker, daemon=True).start()
+    app.run(host='0.0.0.0', port=PORT, threaded=True)
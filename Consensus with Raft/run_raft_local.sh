@@ -0,0 +1,36 @@
+#!/usr/bin/env bash
+set -e
+
+GREEN='\033[0;32m'
+BLUE='\033[0;34m'
+NC='\033[0m'
+
+NODES=("http://127.0.0.1:6001" "http://127.0.0.1:6002" "http://127.0.0.1:6003")
+PIDS=()
+
+cleanup() { kill "${PIDS[@]}" 2>/dev/null || true; }
+trap cleanup EXIT
+
+echo -e "${BLUE}1) Starting 3 native Raft nodes on ports 6001-6003…${NC}"
+for i in 0 1 2; do
+  PEER_URLS=()
+  for j in 0 1 2; do
+    [ "$i" != "$j" ] && PEER_URLS+=("${NODES[$j]}")
+  done
+  NODE_ID=$((i + 1)) PORT=$((6001 + i)) SELF_URL="${NODES[$i]}" \
+    python raft_node.py "${PEER_URLS[@]}" > "raft_node$((i + 1)).log" 2>&1 &
+  PIDS+=($!)
+done
+
+echo -e "${BLUE}2) Waiting for leader election (3s)…${NC}"
+sleep 3
+
+echo -e "${BLUE}3) Checking cluster status:${NC}"
+for url in "${NODES[@]}"; do
+  curl -s "$url/status"; echo
+done
+
+echo -e "${BLUE}\n4) Running Python client: writes, reads & throughput${NC}"
+python raft_client.py "$@"
+
+echo -e "${GREEN}\nDone. Node logs are in raft_node*.log${NC}"
@@ -0,0 +1,103 @@
+import bisect
+import hashlib
+import queue
+import threading
+
+from .paxos import PaxosNode
+
+
+def _hash(text):
+    """A stable hash, identical on every node (unlike Python's hash())."""
+    return int(hashlib.md5(text.encode()).hexdigest(), 16)
+
+
+class HashRing:
+    """Consistent-hash ring mapping keys onto Paxos group ids."""
+
+    def __init__(self, num_groups, replicas=64):
+        self.num_groups = num_groups
+        self.ring = sorted(
+            (_hash(f"group-{group_id}#{replica}"), group_id)
+            for group_id in range(num_groups)
+            for replica in range(replicas)
+        )
+        self.points = [point for point, _ in self.ring]
+
+    def group_for(self, key):
+        index = bisect.bisect(self.points, _hash(str(key))) % len(self.ring)
+        return self.ring[index][1]
+
+
+class PeerSender:
+    """Sends to one peer from a dedicated thread, in order. Work queued for a
+    round that has already finished is skipped, so a slow or stopped peer
+    only ever delays its own sends, never those to faster peers."""
+
+    def __init__(self, maxsize=0):
+        self.queue = queue.Queue(maxsize)
+        threading.Thread(target=self.run, daemon=True).start()
+
+    def submit(self, fn, *args, round_done=None):
+        """Queues fn(*args); returns False if the queue is full."""
+        try:
+            self.queue.put_nowait((fn, args, round_done))
+            return True
+        except queue.Full:
+            return False
+
+    def run(self):
+        while True:
+            fn, args, round_done = self.queue.get()
+            if round_done is not None and round_done.is_set():
+                continue
+            fn(*args)
+
+
+class PaxosGroup:
+    """One independent Paxos group: its acceptor/learner state plus the
+    proposer state and work queue used when this node leads the group."""
+
+    def __init__(self, group_id, node_id, peers):
+        self.group_id = group_id
+        self.peers = peers
+        # Group leaders are spread round-robin across the nodes
+        self.leader_address = peers[group_id % len(peers)]
+        self.paxos_node = PaxosNode(node_id, peers, group_id)
+
+        # Proposer state, only used on the leader
+        self.queue = queue.Queue()
+        self.ballot = None   # proposal number we hold promises for, if any
+        self.next_slot = 1
+        self.recovered = {}  # slot -> value we must re-propose after Phase 1
+
+        # One sender per peer for prepare/accept, and a separate one for
+        # learns, created on first use (only the leader sends)
+        self.senders = {}
+        self.learn_senders = {}
+
+        # Held while this node fetches missed slots from the group leader
+        self.catch_up_lock = threading.Lock()
+
+    def sender(self, peer):
+        if peer not in self.senders:
+            self.senders[peer] = PeerSender()
+        return self.senders[peer]
+
+    def learn_sender(self, peer):
+        # Bounded: a learner that misses learns catches up from the leader
+        if peer not in self.learn_senders:
+            self.learn_senders[peer] = PeerSender(maxsize=1000)
+        return self.learn_senders[peer]
+
+    def status(self):
+        node = self.paxos_node
+        return {
+            "group_id": self.group_id,
+            "leader": self.leader_address,
+            "proposal_number": node.proposal_number,
+            "promised_proposal_number": node.promised_proposal_number,
+            "next_slot": self.next_slot,
+            "applied_slot": node.applied_slot,
+            "pending": self.queue.qsize(),
+            "keys": len(node.store),
+        }
@@ -1,54 +1,70 @@
 import threading
 
 class PaxosNode:
-    def __init__(self, node_id, peers):
+    def __init__(self, node_id, peers, group_id=0):
         self.node_id = node_id
         self.peers = peers
+        self.group_id = group_id
+        self.tag = f"{node_id}/g{group_id}"
         self.proposal_number = 0
+        # A promise covers every slot of the group (Multi-Paxos), so Phase 1
+        # only has to run again when another proposer preempts us.
         self.promised_proposal_number = -1
-        self.accepted_proposal_number = -1
-        self.accepted_value = None
-        self.learned_value = None
+        self.accepted = {}   # slot -> {"proposal_number": n, "value": v}
+        self.learned = {}    # slot -> value
+        self.applied_slot = 0
+        self.store = {}      # key -> value, built from learned slots in order
         self.lock = threading.Lock()
-        self.is_proposing = False
 
-    def get_next_proposal_number(self):
+    def get_next_proposal_number(self, at_least=0):
         with self.lock:
-            self.proposal_number += 1
+            self.proposal_number = max(self.proposal_number, at_least) + 1
             return self.proposal_number
 
-    def handle_prepare(self, proposal_number):
+    def handle_prepare(self, proposal_number, from_slot=1):
         """The core logic for an Acceptor handling a 'prepare' request."""
         with self.lock:
-            print(f"[{self.node_id}][Acceptor] Received PREPARE for proposal_number={proposal_number}. My current promised_proposal_number is {self.promised_proposal_number}.")
-            
+            print(f"[{self.tag}][Acceptor] Received PREPARE for proposal_number={proposal_number} from slot {from_slot}. My current promised_proposal_number is {self.promised_proposal_number}.")
+
             if proposal_number > self.promised_proposal_number:
-                print(f"[{self.node_id}][Acceptor] --> Incoming proposal {proposal_number} is HIGHER than my last promise {self.promised_proposal_number}. I will promise and update my promised_proposal_number.")
+                print(f"[{self.tag}][Acceptor] --> Incoming proposal {proposal_number} is HIGHER than my last promise {self.promised_proposal_number}. I will promise and update my promised_proposal_number.")
                 self.promised_proposal_number = proposal_number
                 return {
                     "promised": True,
-                    "accepted_proposal_number": self.accepted_proposal_number,
-                    "accepted_value": self.accepted_value,
+                    "accepted": {slot: acc for slot, acc in self.accepted.items() if slot >= from_slot},
+                    "learned_through": self.applied_slot,
                 }
             else:
-                print(f"[{self.node_id}][Acceptor] --> Incoming proposal {proposal_number} is NOT HIGHER than my last promise {self.promised_proposal_number}. I will REJECT.")
-                return {"promised": False}
+                print(f"[{self.tag}][Acceptor] --> Incoming proposal {proposal_number} is NOT HIGHER than my last promise {self.promised_proposal_number}. I will REJECT.")
+                return {"promised": False, "promised_proposal_number": self.promised_proposal_number}
 
-    def handle_propose(self, proposal_number, value):
+    def handle_propose(self, proposal_number, slot, value):
         """The core logic for an Acceptor handling an 'accept' request."""
         with self.lock:
-            print(f"[{self.node_id}][Acceptor] Received ACCEPT for proposal_number={proposal_number} and value='{value}'. My current promised_proposal_number is {self.promised_proposal_number}.")
+            print(f"[{self.tag}][Acceptor] Received ACCEPT for slot {slot}, proposal_number={proposal_number} and value='{value}'. My current promised_proposal_number is {self.promised_proposal_number}.")
 
             if proposal_number >= self.promised_proposal_number:
-                print(f"[{self.node_id}][Acceptor] --> Incoming proposal {proposal_number} is GTE my last promise {self.promised_proposal_number}. I will ACCEPT this value and update my state.")
+                print(f"[{self.tag}][Acceptor] --> Incoming proposal {proposal_number} is GTE my last promise {self.promised_proposal_number}. I will ACCEPT this value and update my state.")
                 self.promised_proposal_number = proposal_number
-                self.accepted_proposal_number = proposal_number
-                self.accepted_value = value
+                self.accepted[slot] = {"proposal_number": proposal_number, "value": value}
                 return {"accepted": True}
             else:
-                print(f"[{self.node_id}][Acceptor] --> Incoming proposal {proposal_number} is LOWER than my last promise {self.promised_proposal_number}. I will REJECT this value.")
-                return {"accepted": False}
+                print(f"[{self.tag}][Acceptor] --> Incoming proposal {proposal_number} is LOWER than my last promise {self.promised_proposal_number}. I will REJECT this value.")
+                return {"accepted": False, "promised_proposal_number": self.promised_proposal_number}
+
+    def learn_value(self, slot, value):
+        with self.lock:
+            print(f"[{self.tag}][Learner] Received LEARN for slot {slot}, value='{value}'. Updating learned values.")
+            self.learned[slot] = value
+            # Apply learned slots to the store strictly in slot order
+            while self.applied_slot + 1 in self.learned:
+                self.applied_slot += 1
+                entry = self.learned[self.applied_slot]
+                if isinstance(entry, dict) and "key" in entry:
+                    self.store[entry["key"]] = entry["value"]
 
-    def learn_value(self, value):
-        print(f"[{self.node_id}][Learner] Received LEARN for value='{value}'. Updating learned_value.")
-        self.learned_value = value
\ No newline at end of file
+    def learned_from(self, from_slot, limit=1000):
+        """Learned values for slots from_slot onward, for lagging learners."""
+        with self.lock:
+            slots = sorted(slot for slot in self.learned if slot >= from_slot)[:limit]
+            return {slot: self.learned[slot] for slot in slots}
@@ -1,7 +1,9 @@
 import requests
 import threading
+import queue
+from requests.adapters import HTTPAdapter
 from flask import Blueprint, request, jsonify
-from .paxos import PaxosNode
+from .groups import HashRing, PaxosGroup
 import os
 import time
 
@@ -11,138 +13,311 @@ bp = Blueprint('routes', __name__)
 peers_str = os.getenv('PEERS', 'paxos-node-1:5000,paxos-node-2:5000,paxos-node-3:5000')
 PEERS = peers_str.split(',')
 NODE_ID = os.getenv('NODE_ID', 'paxos-node-1')
-SELF_ADDRESS = f"{NODE_ID}:5000"
+SELF_ADDRESS = os.getenv('SELF_ADDRESS', f"{NODE_ID}:5000")
 
-# --- LEADER ELECTION (SIMULATED) ---
-LEADER_ADDRESS = 'paxos-node-1:5000'
-IS_LEADER = (SELF_ADDRESS == LEADER_ADDRESS)
+# --- KEY-PARTITIONED GROUPS ---
+# Keys are mapped to independent Paxos groups by consistent hashing. Group g
+# is led by PEERS[g % len(PEERS)], so leadership is spread across the nodes
+# and every group this node leads gets its own proposer worker.
+NUM_GROUPS = int(os.getenv('PAXOS_GROUPS', len(PEERS)))
+PROPOSE_TIMEOUT = float(os.getenv('PROPOSE_TIMEOUT', 10))
+
+# --- QUORUMS (FLEXIBLE PAXOS) ---
+# Safety only needs every Phase-1 quorum to intersect every Phase-2 quorum,
+# i.e. PHASE1_QUORUM + PHASE2_QUORUM > N. A small Phase-2 quorum makes the
+# steady-state commit wait only for the fastest few acceptors, paid for with
+# a larger Phase-1 quorum on (rare) leader changes. Both default to a majority.
+MAJORITY = len(PEERS) // 2 + 1
+PHASE1_QUORUM = int(os.getenv('PHASE1_QUORUM', MAJORITY))
+PHASE2_QUORUM = int(os.getenv('PHASE2_QUORUM', MAJORITY))
+
+
+def validate_quorums(n, phase1, phase2):
+    if not (1 <= phase1 <= n and 1 <= phase2 <= n):
+        raise ValueError(f"Quorum sizes must be between 1 and N={n}, got PHASE1_QUORUM={phase1}, PHASE2_QUORUM={phase2}")
+    if phase1 + phase2 <= n:
+        raise ValueError(f"PHASE1_QUORUM + PHASE2_QUORUM must exceed N={n} so the quorums intersect, got {phase1} + {phase2}")
+
+validate_quorums(len(PEERS), PHASE1_QUORUM, PHASE2_QUORUM)
+QUORUM_MODE = 'majority' if PHASE1_QUORUM == PHASE2_QUORUM == MAJORITY else 'flexible'
+print(f"[{NODE_ID}] Quorum mode is {QUORUM_MODE}: Phase 1 needs {PHASE1_QUORUM}, Phase 2 needs {PHASE2_QUORUM} of {len(PEERS)} nodes.")
 
 # --- Global Objects ---
-paxos_node = PaxosNode(NODE_ID, PEERS)
+ring = HashRing(NUM_GROUPS)
+groups = [PaxosGroup(group_id, NODE_ID, PEERS) for group_id in range(NUM_GROUPS)]
+# Each group leader keeps an accept and a learn sender per peer, each of
+# which may hold a keep-alive connection.
 session = requests.Session()
+session.mount('http://', HTTPAdapter(pool_maxsize=max(10, 2 * NUM_GROUPS)))
+
+
+def get_group(group_id):
+    return groups[int(group_id or 0)]
+
+
+def gather_quorum(group, send, is_ok, quorum, timeout=10):
+    """Sends to every peer in parallel and returns the successful replies as
+    soon as `quorum` of them have arrived, or once the quorum is out of reach.
+    Also returns every reply received so far. Sends still queued behind a
+    slow peer when the round ends are dropped rather than sent late."""
+    replies = queue.Queue()
+    round_done = threading.Event()
+    for peer in PEERS:
+        if peer == SELF_ADDRESS:
+            replies.put(send(peer))
+        else:
+            group.sender(peer).submit(lambda peer=peer: replies.put(send(peer)), round_done=round_done)
+
+    successes, received, failures = [], [], 0
+    deadline = time.monotonic() + timeout
+    try:
+        while len(successes) < quorum and len(PEERS) - failures >= quorum:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                reply = replies.get(timeout=remaining)
+            except queue.Empty:
+                break
+            received.append(reply)
+            if reply is not None and is_ok(reply):
+                successes.append(reply)
+            else:
+                failures += 1
+    finally:
+        round_done.set()
+    return successes, received
 
 
 @bp.route('/propose', methods=['POST'])
 def propose_value():
     value_to_propose = request.json.get('value')
     if not value_to_propose: return jsonify({"error": "Value is required"}), 400
+    key = request.json.get('key', value_to_propose)
+    # With "wait": true the reply is only sent once the value has been chosen
+    wait = bool(request.json.get('wait', False))
+    group = groups[ring.group_for(key)]
 
-    if not IS_LEADER:
-        print(f"[{NODE_ID}][Forwarder] I am not the leader. Forwarding request to {LEADER_ADDRESS}")
+    if group.leader_address != SELF_ADDRESS:
+        print(f"[{NODE_ID}][Forwarder] I am not the leader of group {group.group_id}. Forwarding request to {group.leader_address}")
         try:
-            session.post(f'http://{LEADER_ADDRESS}/propose', json={'value': value_to_propose}, timeout=5)
+            response = session.post(f'http://{group.leader_address}/propose', json={'key': key, 'value': value_to_propose, 'wait': wait}, timeout=PROPOSE_TIMEOUT + 5)
         except requests.exceptions.RequestException as e:
             return jsonify({"error": "Could not forward request to leader.", "details": str(e)}), 503
-        return jsonify({"message": f"Request forwarded to leader node {LEADER_ADDRESS}"})
+        if wait:
+            return jsonify(response.json()), response.status_code
+        return jsonify({"message": f"Request forwarded to leader node {group.leader_address} of group {group.group_id}"})
 
-    if paxos_node.is_proposing: return jsonify({"error": "A proposal is already in progress on this node. Please wait."}), 429
+    done = threading.Event() if wait else None
+    group.queue.put(({'key': key, 'value': value_to_propose}, done))
+    if done is None:
+        return jsonify({"message": f"Proposal for value '{value_to_propose}' queued on group {group.group_id} led by {NODE_ID}"}), 202
+    if not done.wait(timeout=PROPOSE_TIMEOUT):
+        return jsonify({"error": f"Value was not chosen within {PROPOSE_TIMEOUT}s", "group": group.group_id}), 504
+    return jsonify({"message": f"Value '{value_to_propose}' chosen by group {group.group_id}", "group": group.group_id})
 
-    thread = threading.Thread(target=run_paxos_proposer, args=(value_to_propose,))
-    thread.start()
-    return jsonify({"message": f"Proposal for value '{value_to_propose}' initiated by leader {NODE_ID}"}), 202
 
+def run_group_worker(group):
+    """Proposer loop for one group this node leads: one value per slot, in order."""
+    while True:
+        value_to_propose, done = group.queue.get()
+        while not run_paxos_proposer(group, value_to_propose):
+            time.sleep(0.1)
+        if done is not None:
+            done.set()
+
+
+def run_paxos_proposer(group, value_to_propose):
+    """Chooses value_to_propose in the group's next free slot. Returns False
+    if this node was preempted and the value should be retried."""
+    paxos_node = group.paxos_node
+    tag = paxos_node.tag
+
+    if group.ballot is None and not run_prepare_phase(group, PHASE1_QUORUM):
+        return False
+
+    # Values accepted under an earlier ballot MUST be chosen again first
+    while group.recovered:
+        slot = min(group.recovered)
+        print(f"[{tag}][Leader] Slot {slot} already holds an accepted value. Re-proposing '{group.recovered[slot]}'.")
+        if not run_accept_phase(group, slot, group.recovered[slot], PHASE2_QUORUM):
+            return False
+        del group.recovered[slot]
+
+    slot = group.next_slot
+    if not run_accept_phase(group, slot, value_to_propose, PHASE2_QUORUM):
+        return False
+    group.next_slot = slot + 1
+    return True
+
+
+def run_prepare_phase(group, quorum_size):
+    paxos_node = group.paxos_node
+    tag = paxos_node.tag
+    print(f"-------------------- NEW BALLOT --------------------")
+    print(f"[{tag}][Leader] Quorum size is {quorum_size}.")
+
+    proposal_number = paxos_node.get_next_proposal_number()
+    from_slot = paxos_node.applied_slot + 1
+    print(f"[{tag}][Leader] --- PHASE 1: PREPARE --- proposal_number={proposal_number}, slots {from_slot} and up")
+
+    def send_prepare(peer):
+        try:
+            if peer == SELF_ADDRESS:
+                return paxos_node.handle_prepare(proposal_number, from_slot)
+            response = session.post(f'http://{peer}/prepare', json={'group': group.group_id, 'proposal_number': proposal_number, 'from_slot': from_slot}, timeout=5)
+            return response.json() if response.status_code == 200 else {"promised": False}
+        except requests.exceptions.RequestException as e:
+            print(f"[{tag}][Leader] ERROR: Could not connect to {peer} for prepare: {e}")
+            return None
+
+    promises, replies = gather_quorum(group, send_prepare, lambda p: p.get("promised"), quorum_size)
+    highest_rejection = max((r.get("promised_proposal_number", 0) for r in replies if r is not None), default=0)
 
-def run_paxos_proposer(value_to_propose):
-    paxos_node.is_proposing = True
+    print(f"[{tag}][Leader] PREPARE phase complete. Received {len(promises)} promises.")
+    if len(promises) < quorum_size:
+        print(f"[{tag}][Leader] FAILED TO GET QUORUM OF PROMISES. Will retry with a higher proposal number.")
+        paxos_node.get_next_proposal_number(at_least=highest_rejection)
+        return False
+
+    print(f"[{tag}][Leader] QUORUM OF PROMISES ACHIEVED. Moving to phase 2.")
+
+    # For every slot, keep the value accepted under the highest proposal number
+    recovered = {}
+    next_slot = from_slot
+    for p in promises:
+        next_slot = max(next_slot, p.get("learned_through", 0) + 1)
+        for slot, acc in p.get("accepted", {}).items():
+            slot = int(slot)  # JSON object keys arrive as strings
+            if slot not in recovered or acc["proposal_number"] > recovered[slot]["proposal_number"]:
+                recovered[slot] = acc
+    if recovered:
+        next_slot = max(next_slot, max(recovered) + 1)
+
+    group.ballot = proposal_number
+    group.recovered = {slot: acc["value"] for slot, acc in recovered.items()}
+    group.next_slot = next_slot
+    return True
+
+
+def run_accept_phase(group, slot, value_to_propose, quorum_size):
+    paxos_node = group.paxos_node
+    tag = paxos_node.tag
+    proposal_number = group.ballot
+    print(f"[{tag}][Leader] --- PHASE 2: ACCEPT --- slot {slot}, value '{value_to_propose}'")
+
+    def send_accept(peer):
+        try:
+            if peer == SELF_ADDRESS:
+                return paxos_node.handle_propose(proposal_number, slot, value_to_propose)
+            response = session.post(f'http://{peer}/accept', json={'group': group.group_id, 'slot': slot, 'proposal_number': proposal_number, 'value': value_to_propose, 'chosen_through': paxos_node.applied_slot}, timeout=5)
+            return response.json() if response.status_code == 200 else {"accepted": False}
+        except requests.exceptions.RequestException as e:
+            print(f"[{tag}][Leader] ERROR: Could not connect to {peer} for accept: {e}")
+            return None
+
+    # Returns as soon as the fastest quorum_size acceptors have answered
+    acceptances = len(gather_quorum(group, send_accept, lambda a: a.get("accepted"), quorum_size)[0])
+
+    print(f"[{tag}][Leader] ACCEPT phase complete. Received {acceptances} acceptances.")
+    if acceptances < quorum_size:
+        print(f"[{tag}][Leader] FAILED TO GET QUORUM OF ACCEPTANCES. Running Phase 1 again.")
+        group.ballot = None
+        return False
+
+    print(f"[{tag}][Leader] QUORUM OF ACCEPTANCES ACHIEVED. CONSENSUS REACHED for slot {slot}!")
+    print(f"[{tag}][Leader] --- PHASE 3: LEARN ---")
+    paxos_node.learn_value(slot, value_to_propose)
+    for peer in PEERS:
+        if peer != SELF_ADDRESS:
+            group.learn_sender(peer).submit(send_learn, peer, group.group_id, slot, value_to_propose, paxos_node.applied_slot)
+    return True
+
+
+def send_learn(peer, group_id, slot, value, chosen_through):
     try:
-        quorum_size = len(PEERS) // 2 + 1
-        print(f"-------------------- NEW PROPOSAL --------------------")
-        print(f"[{NODE_ID}][Leader] Quorum size is {quorum_size}.")
-        
-        proposal_number = paxos_node.get_next_proposal_number()
-        print(f"[{NODE_ID}][Leader] Starting Paxos for value '{value_to_propose}' with new proposal_number={proposal_number}")
-        print(f"[{NODE_ID}][Leader] --- PHASE 1: PREPARE ---")
-
-        promises = []
-        for peer in PEERS:
-            try:
-                if peer == SELF_ADDRESS:
-                    promise = paxos_node.handle_prepare(proposal_number)
-                else:
-                    response = session.post(f'http://{peer}/prepare', json={'proposal_number': proposal_number}, timeout=5)
-                    promise = response.json() if response.status_code == 200 else {"promised": False}
-                
-                if promise.get("promised"):
-                    promises.append(promise)
-            except requests.exceptions.RequestException as e:
-                print(f"[{NODE_ID}][Leader] ERROR: Could not connect to {peer} for prepare: {e}")
-
-        print(f"[{NODE_ID}][Leader] PREPARE phase complete. Received {len(promises)} promises.")
-        if len(promises) < quorum_size:
-            print(f"[{NODE_ID}][Leader] FAILED TO GET QUORUM OF PROMISES. Aborting.")
-            print(f"------------------------------------------------------")
-            return
-
-        print(f"[{NODE_ID}][Leader] QUORUM OF PROMISES ACHIEVED. Moving to phase 2.")
-        
-        highest_accepted_proposal = -1
-        value_from_promises = None
-        for p in promises:
-            if p.get("accepted_proposal_number", -1) > highest_accepted_proposal:
-                highest_accepted_proposal = p["accepted_proposal_number"]
-                if p.get("accepted_value") is not None:
-                    value_from_promises = p["accepted_value"]
-
-        if value_from_promises:
-            value_to_propose = value_from_promises
-            print(f"[{NODE_ID}][Leader] A promise contained a previously accepted value ('{value_to_propose}' from proposal {highest_accepted_proposal}). This value MUST be proposed.")
-        else:
-            print(f"[{NODE_ID}][Leader] No previously accepted values found in promises. Proposing my own value: '{value_to_propose}'.")
+        # Fire-and-forget: a learner that misses this catches up from the
+        # chosen_through carried by the group's next accept or learn.
+        session.post(f'http://{peer}/learn', json={'group': group_id, 'slot': slot, 'value': value, 'chosen_through': chosen_through}, timeout=2)
+    except requests.exceptions.RequestException: pass
 
-        print(f"[{NODE_ID}][Leader] --- PHASE 2: ACCEPT ---")
-        acceptances = 0
-        for peer in PEERS:
-            try:
-                if peer == SELF_ADDRESS:
-                    acceptance = paxos_node.handle_propose(proposal_number, value_to_propose)
-                else:
-                    response = session.post(f'http://{peer}/accept', json={'proposal_number': proposal_number, 'value': value_to_propose}, timeout=5)
-                    acceptance = response.json() if response.status_code == 200 else {"accepted": False}
-
-                if acceptance.get("accepted"):
-                    acceptances += 1
-            except requests.exceptions.RequestException as e:
-                print(f"[{NODE_ID}][Leader] ERROR: Could not connect to {peer} for accept: {e}")
-
-        print(f"[{NODE_ID}][Leader] ACCEPT phase complete. Received {acceptances} acceptances.")
-        if acceptances >= quorum_size:
-            print(f"[{NODE_ID}][Leader] QUORUM OF ACCEPTANCES ACHIEVED. CONSENSUS REACHED!")
-            print(f"[{NODE_ID}][Leader] --- PHASE 3: LEARN ---")
-            for peer in PEERS:
-                try:
-                    # In a real system, you might retry this. For us, it's fire-and-forget.
-                    session.post(f'http://{peer}/learn', json={'value': value_to_propose}, timeout=2)
-                except requests.exceptions.RequestException: pass
-        else:
-            print(f"[{NODE_ID}][Leader] FAILED TO GET QUORUM OF ACCEPTANCES. Consensus failed for this round.")
-        
-        print(f"------------------------------------------------------")
 
+def maybe_catch_up(group, chosen_through):
+    """Fetches slots this node missed (lost learns, or a restart) from the
+    group leader when the leader reports having chosen past our applied_slot."""
+    if chosen_through is None or group.leader_address == SELF_ADDRESS:
+        return
+    if group.paxos_node.applied_slot >= chosen_through or not group.catch_up_lock.acquire(blocking=False):
+        return
+    threading.Thread(target=run_catch_up, args=(group, chosen_through), daemon=True).start()
+
+
+def run_catch_up(group, chosen_through):
+    paxos_node = group.paxos_node
+    try:
+        while paxos_node.applied_slot < chosen_through:
+            from_slot = paxos_node.applied_slot + 1
+            print(f"[{paxos_node.tag}][Learner] Missing slots {from_slot}..{chosen_through}. Fetching them from {group.leader_address}.")
+            response = session.get(f'http://{group.leader_address}/learned', params={'group': group.group_id, 'from_slot': from_slot}, timeout=5)
+            learned = response.json().get("learned", {}) if response.status_code == 200 else {}
+            if not learned:
+                return
+            for slot, value in learned.items():
+                paxos_node.learn_value(int(slot), value)  # JSON object keys arrive as strings
+            if paxos_node.applied_slot < from_slot:
+                return
+    except requests.exceptions.RequestException as e:
+        print(f"[{paxos_node.tag}][Learner] ERROR: Could not catch up from {group.leader_address}: {e}")
     finally:
-        paxos_node.is_proposing = False
+        group.catch_up_lock.release()
+
+
+for _group in groups:
+    if _group.leader_address == SELF_ADDRESS:
+        threading.Thread(target=run_group_worker, args=(_group,), daemon=True).start()
 
 
-# (The rest of the file: /prepare, /accept, /learn, /status endpoints remain the same)
 @bp.route('/prepare', methods=['POST'])
 def prepare():
-    return jsonify(paxos_node.handle_prepare(request.json.get('proposal_number')))
+    group = get_group(request.json.get('group'))
+    return jsonify(group.paxos_node.handle_prepare(request.json.get('proposal_number'), request.json.get('from_slot', 1)))
 
 @bp.route('/accept', methods=['POST'])
 def accept_proposal():
-    return jsonify(paxos_node.handle_propose(request.json.get('proposal_number'), request.json.get('value')))
+    group = get_group(request.json.get('group'))
+    maybe_catch_up(group, request.json.get('chosen_through'))
+    return jsonify(group.paxos_node.handle_propose(request.json.get('proposal_number'), request.json.get('slot'), request.json.get('value')))
 
 @bp.route('/learn', methods=['POST'])
 def learn():
-    paxos_node.learn_value(request.json.get('value'))
+    group = get_group(request.json.get('group'))
+    group.paxos_node.learn_value(request.json.get('slot'), request.json.get('value'))
+    maybe_catch_up(group, request.json.get('chosen_through'))
     return jsonify({"message": "Value learned successfully"})
 
+@bp.route('/learned', methods=['GET'])
+def learned():
+    group = get_group(request.args.get('group'))
+    from_slot = int(request.args.get('from_slot', 1))
+    return jsonify({"group": group.group_id, "learned": group.paxos_node.learned_from(from_slot)})
+
+@bp.route('/get', methods=['GET'])
+def get_value():
+    key = request.args.get('key')
+    group = groups[ring.group_for(key)]
+    return jsonify({"key": key, "group": group.group_id, "value": group.paxos_node.store.get(key)})
+
 @bp.route('/status', methods=['GET'])
 def get_status():
     return jsonify({
-        "node_id": paxos_node.node_id,
-        "proposal_number": paxos_node.proposal_number,
-        "promised_proposal_number": paxos_node.promised_proposal_number,
-        "accepted_proposal_number": paxos_node.accepted_proposal_number,
-        "accepted_value": paxos_node.accepted_value,
-        "learned_value": paxos_node.learned_value
-    })
\ No newline at end of file
+        "node_id": NODE_ID,
+        "num_groups": NUM_GROUPS,
+        "quorum": {
+            "mode": QUORUM_MODE,
+            "cluster_size": len(PEERS),
+            "phase1": PHASE1_QUORUM,
+            "phase2": PHASE2_QUORUM,
+        },
+        "leads_groups": [g.group_id for g in groups if g.leader_address == SELF_ADDRESS],
+        "groups": [g.status() for g in groups],
+    })
@@ -3,7 +3,7 @@ import time
 import os
 
 # The primary node (node0) is the entry point for client requests
-PRIMARY_NODE_URL = "http://node0:5000"
+PRIMARY_NODE_URL = os.environ.get('PRIMARY_NODE_URL', "http://node0:5000")
 CLIENT_ID = int(os.getpid()) # Use process ID as a simple client ID
 
 def print_log(message):
@@ -14,6 +14,7 @@ app = Flask(__name__)
 NODE_ID = int(os.environ.get('NODE_ID', 0))
 IS_PRIMARY = os.environ.get('IS_PRIMARY', 'false').lower() == 'true'
 IS_TRAITOR = os.environ.get('IS_TRAITOR', 'false').lower() == 'true'
+PORT = int(os.environ.get('PORT', 5000))
 
 # Get peer nodes from command-line arguments
 PEERS = sys.argv[1:]
@@ -23,9 +24,10 @@ FAULT_TOLERANCE = (TOTAL_NODES - 1) // 3
 # State variables
 state = {} # Simple key-value store
 sequence_number = 0
-request_log = [] # To store client requests
-prepare_log = defaultdict(list) # To log prepare messages
-commit_log = defaultdict(list) # To log commit messages
+request_log = {} # To store client requests, by sequence number
+prepare_log = defaultdict(set) # Senders of prepare messages, per seq_num
+commit_log = defaultdict(set) # Senders of commit messages, per seq_num
+prepared_requests = set() # To track requests we sent a COMMIT for
 committed_requests = set() # To track committed requests
 lock = Lock()
 
@@ -52,7 +54,7 @@ def handle_request(client_request):
     global sequence_number
     with lock:
         sequence_number += 1
-        request_log.append(client_request)
+        request_log[sequence_number] = client_request
 
         pre_prepare_message = {
             "type": "pre-prepare",
@@ -72,7 +74,7 @@ def handle_pre_prepare(message):
         print_log(f"Received PRE-PREPARE for seq_num {seq_num}")
 
         # Basic validation (in a real system, would check view, signature, etc.)
-        request_log.append(message['request'])
+        request_log[seq_num] = message['request']
         
         prepare_message = {
             "type": "prepare",
@@ -83,45 +85,58 @@ def handle_pre_prepare(message):
         }
         print_log(f"Broadcasting PREPARE for seq_num {seq_num}")
         broadcast("/prepare", prepare_message)
+        # A replica's own prepare counts towards its prepared certificate
+        record_prepare(prepare_message)
 
 def handle_prepare(message):
     """All nodes handle a prepare message."""
     with lock:
-        seq_num = message['seq_num']
-        prepare_log[seq_num].append(message['sender_id'])
-        
-        # Check if we have enough prepare messages to be "prepared"
-        if len(prepare_log[seq_num]) >= 2 * FAULT_TOLERANCE and seq_num not in committed_requests:
-            print_log(f"Reached PREPARED state for seq_num {seq_num}")
-            
-            commit_message = {
-                "type": "commit",
-                "view": 1,
-                "seq_num": seq_num,
-                "digest": message['digest'],
-                "sender_id": NODE_ID
-            }
-            print_log(f"Broadcasting COMMIT for seq_num {seq_num}")
-            broadcast("/commit", commit_message)
+        record_prepare(message)
+
+def record_prepare(message):
+    """Logs a prepare (caller holds the lock) and commits once prepared."""
+    seq_num = message['seq_num']
+    prepare_log[seq_num].add(message['sender_id'])
+
+    # Check if we have enough prepare messages to be "prepared"
+    if len(prepare_log[seq_num]) >= 2 * FAULT_TOLERANCE and seq_num not in prepared_requests:
+        prepared_requests.add(seq_num)
+        print_log(f"Reached PREPARED state for seq_num {seq_num}")
+
+        commit_message = {
+            "type": "commit",
+            "view": 1,
+            "seq_num": seq_num,
+            "digest": message['digest'],
+            "sender_id": NODE_ID
+        }
+        print_log(f"Broadcasting COMMIT for seq_num {seq_num}")
+        broadcast("/commit", commit_message)
+        # Likewise, our own commit counts towards the 2f+1 needed
+        record_commit(commit_message)
 
 def handle_commit(message):
     """All nodes handle a commit message."""
     with lock:
-        seq_num = message['seq_num']
-        commit_log[seq_num].append(message['sender_id'])
+        record_commit(message)
 
-        # Check if we have enough commit messages to be "committed"
-        if len(commit_log[seq_num]) >= 2 * FAULT_TOLERANCE + 1 and seq_num not in committed_requests:
-            committed_requests.add(seq_num)
-            print_log(f"Reached COMMITTED state for seq_num {seq_num}")
-            execute_request(seq_num)
+def record_commit(message):
+    """Logs a commit (caller holds the lock) and executes once committed."""
+    seq_num = message['seq_num']
+    commit_log[seq_num].add(message['sender_id'])
+
+    # Check if we have enough commit messages to be "committed"
+    if len(commit_log[seq_num]) >= 2 * FAULT_TOLERANCE + 1 and seq_num not in committed_requests:
+        committed_requests.add(seq_num)
+        print_log(f"Reached COMMITTED state for seq_num {seq_num}")
+        execute_request(seq_num)
 
 def execute_request(seq_num):
     """Executes the request and updates the state."""
-    # Find the request corresponding to the sequence number
-    # This is simplified; a real system would use a more robust mapping
-    if seq_num - 1 < len(request_log):
-        client_request = request_log[seq_num - 1]
+    # Find the request corresponding to the sequence number. Pre-prepares
+    # can arrive out of order, so requests are looked up by seq_num.
+    if seq_num in request_log:
+        client_request = request_log[seq_num]
         op = client_request['operation']
         if op['type'] == 'set':
             state[op['key']] = op['value']
@@ -166,7 +181,25 @@ def commit_endpoint():
     Thread(target=handle_commit, args=(message,)).start()
     return jsonify({"status": "ack"})
 
+@app.route('/status', methods=['GET'])
+def status_endpoint():
+    with lock:
+        return jsonify({
+            "node_id": NODE_ID,
+            "is_primary": IS_PRIMARY,
+            "is_traitor": IS_TRAITOR,
+            "sequence_number": sequence_number,
+            "committed": len(committed_requests),
+            "keys": len(state),
+        })
+
+@app.route('/get', methods=['GET'])
+def get_endpoint():
+    key = request.args.get('key')
+    with lock:
+        return jsonify({"key": key, "value": state.get(key)})
+
 if __name__ == '__main__':
     print_log(f"Starting Node. N={TOTAL_NODES}, k={FAULT_TOLERANCE}")
-    app.run(host='0.0.0.0', port=5000)
+    app.run(host='0.0.0.0', port=PORT)
 
@@ -3,10 +3,15 @@ from flask import Flask, request
 
 app = Flask(__name__)
 
-# Environment variables passed by Docker Compose
+# Environment variables passed by Docker Compose (or bench/cluster.py)
 NODE_ID       = int(os.environ['NODE_ID'])
 ALL_NODES     = [int(x) for x in os.environ['ALL_NODES'].split(',')]
-BASE_PORT     = 5000
+BASE_PORT     = int(os.environ.get('PORT', 5000))
+# Optional "1=127.0.0.1:7001,2=127.0.0.1:7002" map; defaults to nodeN:5000
+NODE_ADDRESSES = dict(
+    (int(k), v) for k, v in
+    (pair.split('=') for pair in os.environ.get('NODE_ADDRESSES', '').split(',') if pair)
+)
 
 leader_id     = None
 election_lock = threading.Lock()
@@ -14,13 +19,16 @@ election_lock = threading.Lock()
 def log(msg):
     print(f"[Node {NODE_ID}] {msg}", flush=True)
 
+def node_url(node_id):
+    return f"http://{NODE_ADDRESSES.get(node_id, f'node{node_id}:{BASE_PORT}')}"
+
 @app.route('/election', methods=['POST'])
 def on_election():
     sender = int(request.json['sender'])
     log(f"Received ELECTION from Node {sender}")
     # Reply OK if this node has higher ID
     if NODE_ID > sender:
-        requests.post(f'http://node{sender}:{BASE_PORT}/ok', json={'sender': NODE_ID})
+        requests.post(f'{node_url(sender)}/ok', json={'sender': NODE_ID})
         threading.Thread(target=start_election, daemon=True).start()
     return ('', 200)
 
@@ -47,7 +55,7 @@ def start_election():
         higher = [n for n in ALL_NODES if n > NODE_ID]
         for peer in higher:
             try:
-                requests.post(f'http://node{peer}:{BASE_PORT}/election', json={'sender': NODE_ID}, timeout=2)
+                requests.post(f'{node_url(peer)}/election', json={'sender': NODE_ID}, timeout=2)
             except:
                 log(f"No response from Node {peer}")
         # wait briefly for OKs
@@ -59,7 +67,7 @@ def start_election():
             for peer in ALL_NODES:
                 if peer != NODE_ID:
                     try:
-                        requests.post(f'http://node{peer}:{BASE_PORT}/coordinator', json={'sender': NODE_ID}, timeout=2)
+                        requests.post(f'{node_url(peer)}/coordinator', json={'sender': NODE_ID}, timeout=2)
                     except:
                         pass
 
@@ -71,7 +79,7 @@ def heartbeat_monitor():
             continue
         # ping leader
         try:
-            requests.get(f'http://node{leader_id}:{BASE_PORT}/heartbeat', timeout=2)
+            requests.get(f'{node_url(leader_id)}/heartbeat', timeout=2)
         except:
             log(f"Leader {leader_id} down. Triggering election.")
             start_election()
@@ -80,10 +88,17 @@ def heartbeat_monitor():
 def heartbeat():
     return ('', 200)
 
+@app.route('/leader', methods=['GET'])
+def leader():
+    return {'node_id': NODE_ID, 'leader_id': leader_id}
+
 if __name__ == '__main__':
     # start heartbeat thread
     threading.Thread(target=heartbeat_monitor, daemon=True).start()
-    # give everyone time to come up before first election
-    time.sleep(2)
-    start_election()
+    # give everyone time to come up before first election; the election runs
+    # in the background so this node already answers peers while it waits
+    def first_election():
+        time.sleep(2)
+        start_election()
+    threading.Thread(target=first_election, daemon=True).start()
     app.run(host='0.0.0.0', port=BASE_PORT)
@@ -19,16 +19,25 @@ INITIAL_ORDER = os.environ.get('ORDER', 'attack') # Commander's initial order
 
 # Get peer nodes from command-line arguments
 PEERS = sys.argv[1:]
-LIEUTENANT_PEERS = [p for p in PEERS if f"node{NODE_ID}" not in p and "node0" not in p]
-COMMANDER_URL = f"http://node0:5000"
+COMMANDER_URL = os.environ.get('COMMANDER_URL', "http://node0:5000")
+LIEUTENANT_PEERS = [p for p in PEERS if p != COMMANDER_URL]
+PORT = int(os.environ.get('PORT', 5000))
+# Seconds to wait for all nodes to start before the commander sends orders
+START_DELAY = float(os.environ.get('START_DELAY', 5))
 
 # State variables
 # Stores the initial order received from the commander
 order_from_commander = None
 # Stores orders relayed from other lieutenants, e.g., {'from_node2': 'attack'}
 orders_from_peers = {}
-# Total number of lieutenants in the system
-num_lieutenants = len(PEERS) if IS_COMMANDER else len(PEERS) -1
+# Total number of lieutenants in the system. A lieutenant's peers are the
+# commander plus the other lieutenants, so the count is len(PEERS) either way.
+num_lieutenants = len(PEERS)
+# Outcome, exposed on /decision: when the commander sent its orders, or
+# what this lieutenant decided and when (wall-clock seconds)
+orders_sent_at = None
+decision = None
+decided_at = None
 
 # --- Helper Functions ---
 def print_log(message):
@@ -97,13 +106,27 @@ def receive_order():
 
     return jsonify({"status": "ack"})
 
+@app.route('/decision', methods=['GET'])
+def get_decision():
+    """Endpoint reporting this node's outcome once the simulation has run."""
+    return jsonify({
+        "node_id": NODE_ID,
+        "is_commander": IS_COMMANDER,
+        "is_traitor": IS_TRAITOR,
+        "orders_sent_at": orders_sent_at,
+        "decision": decision,
+        "decided_at": decided_at,
+    })
+
 # --- Main Application Logic ---
 def run_simulation():
     """Main function to start the Byzantine agreement process."""
+    global orders_sent_at, decision, decided_at
     # Give all nodes a moment to start up
-    time.sleep(5) 
-    
+    time.sleep(START_DELAY)
+
     if IS_COMMANDER:
+        orders_sent_at = time.time()
         print_log("I am the Commander.")
         # Traitorous commander sends conflicting orders
         if IS_TRAITOR:
@@ -142,6 +165,7 @@ def run_simulation():
         final_orders.update(orders_from_peers)
         
         majority = decide_majority(final_orders)
+        decision, decided_at = majority, time.time()
         
         if majority != "no majority":
             decision_str = "ATTACK" if majority == "attack" else "RETREAT"
@@ -157,4 +181,4 @@ if __name__ == '__main__':
     simulation_thread.start()
     
     # Run the Flask web server
-    app.run(host='0.0.0.0', port=5000)
+    app.run(host='0.0.0.0', port=PORT)
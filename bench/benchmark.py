@@ -0,0 +1,518 @@
+#!/usr/bin/env python3
+# benchmark.py
+# Cross-protocol throughput and latency benchmarks on local clusters started
+# by cluster.py. Every combination of protocol, cluster size, client
+# concurrency, payload size and fault is run on a fresh cluster, and the
+# results are written as a JSON report that later runs can be compared to:
+#
+#   python bench/benchmark.py --protocols raft,paxos --sizes 3,5 --concurrency 1,16
+#   python bench/benchmark.py --baseline bench/results/bench-20261019-120000.json
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+import requests
+
+from cluster import Cluster, REPO_ROOT, parse_env
+
+sys.path.insert(0, os.path.join(REPO_ROOT, 'Paxos'))
+from app.groups import HashRing  # the key -> group mapping the Paxos nodes use
+
+# Faults each protocol can be run under. "none" is always the first entry.
+FAULTS = {
+    'raft': ['none', 'kill-follower', 'kill-leader'],
+    # Group leaders are static, so a crashed node stalls its groups; a paused
+    # (SIGSTOPped) acceptor only slows down the quorums it is part of.
+    'paxos': ['none', 'slow-acceptor'],
+    'pbft': ['none', 'traitor'],
+    'election': ['none', 'kill-leader'],
+    'byzantine': ['none', 'traitor', 'traitor-commander'],
+}
+# Smallest cluster each protocol makes sense on
+MIN_NODES = {'raft': 1, 'paxos': 1, 'pbft': 4, 'election': 2, 'byzantine': 3}
+# Protocols driven by a stream of client writes; the others are one-shot
+# agreements for which concurrency and payload size do not apply.
+REQUEST_WORKLOADS = {'raft', 'paxos', 'pbft'}
+
+OP_TIMEOUT = 10.0
+# A run is abandoned after this many failed operations in a row, so a
+# cluster that cannot make progress costs seconds rather than ops*timeout.
+MAX_CONSECUTIVE_ERRORS = 5
+# How often election nodes ping their leader (heartbeat_monitor in
+# "Process Coordination & Leader Election/node.py")
+ELECTION_HEARTBEAT = 5.0
+
+
+# --- Helpers ---
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def summarize(latencies, errors, duration):
+    latencies = sorted(latencies)
+    ms = lambda value: round(value * 1000, 3) if value is not None else None
+    return {
+        "ok": len(latencies),
+        "errors": errors,
+        "duration_s": round(duration, 3),
+        "throughput_ops_s": round(len(latencies) / duration, 2) if duration > 0 else 0.0,
+        "latency_ms": {
+            "mean": ms(sum(latencies) / len(latencies)) if latencies else None,
+            "p50": ms(percentile(latencies, 0.50)),
+            "p95": ms(percentile(latencies, 0.95)),
+            "p99": ms(percentile(latencies, 0.99)),
+            "max": ms(latencies[-1]) if latencies else None,
+        },
+    }
+
+def run_closed_loop(op, ops, concurrency):
+    """Runs `ops` calls of op(session, i) from `concurrency` client threads,
+    each issuing its next operation as soon as the previous one finishes.
+    Stops early after MAX_CONSECUTIVE_ERRORS failures in a row."""
+    latencies, errors, consecutive = [], [0], [0]
+    aborted = threading.Event()
+    lock = threading.Lock()
+
+    def worker(worker_id):
+        session = requests.Session()
+        for i in range(worker_id, ops, concurrency):
+            if aborted.is_set():
+                return
+            start = time.perf_counter()
+            try:
+                ok = op(session, i)
+            except requests.exceptions.RequestException:
+                ok = False
+            elapsed = time.perf_counter() - start
+            with lock:
+                if ok:
+                    latencies.append(elapsed)
+                    consecutive[0] = 0
+                else:
+                    errors[0] += 1
+                    consecutive[0] += 1
+                    if consecutive[0] >= MAX_CONSECUTIVE_ERRORS:
+                        aborted.set()
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(w,)) for w in range(concurrency)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    result = summarize(latencies, errors[0], time.perf_counter() - started)
+    if aborted.is_set():
+        result["aborted"] = f"stopped after {MAX_CONSECUTIVE_ERRORS} consecutive failed operations"
+    return result
+
+def wait_until(predicate, timeout, interval=0.05):
+    """Polls predicate() until it returns something other than None."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            result = predicate()
+        except requests.exceptions.RequestException:
+            result = None
+        if result is not None:
+            return result
+        time.sleep(interval)
+    return None
+
+def payload(size, i):
+    prefix = f"{i}:"
+    return prefix + 'x' * max(0, size - len(prefix))
+
+
+# --- Workloads ---
+def find_raft_leader(cluster):
+    for i, url in enumerate(cluster.urls):
+        if cluster.processes[i] is None:
+            continue
+        try:
+            if requests.get(f"{url}/status", timeout=1).json()["state"] == "leader":
+                return i
+        except requests.exceptions.RequestException:
+            continue
+
+def raft_leader(cluster):
+    return wait_until(lambda: find_raft_leader(cluster), timeout=15)
+
+def bench_raft(cluster, config):
+    leader = raft_leader(cluster)
+    if leader is None:
+        raise RuntimeError("no Raft leader elected")
+    leader_url = [cluster.urls[leader]]
+
+    # Faults are injected halfway through the run, so the run measures the
+    # failover itself and not only the smaller cluster left behind
+    fault = config["fault"] if len(cluster.urls) > 1 else "none"
+    kill_at = config["ops"] // 2
+    failover = {}
+
+    def inject():
+        victim = cluster.urls.index(leader_url[0])
+        if fault == "kill-follower":
+            victim = next(i for i in range(len(cluster.urls)) if i != victim)
+        cluster.kill(victim)
+        failover.update(killed=victim, killed_at_op=kill_at, killed_at=time.perf_counter())
+
+    def op(session, i):
+        if i == kill_at and fault != "none":
+            inject()
+        value = payload(config["payload_bytes"], i)
+        deadline = time.monotonic() + OP_TIMEOUT
+        while time.monotonic() < deadline:
+            url = leader_url[0]
+            try:
+                response = session.post(f"{url}/put", json={"key": f"k{i}", "value": value}, timeout=OP_TIMEOUT)
+            except requests.exceptions.ConnectionError:
+                response = None
+            if response is not None and response.status_code == 200:
+                if "killed_at" in failover and "recovered_at" not in failover:
+                    failover["recovered_at"] = time.perf_counter()
+                return True
+            if response is not None and response.status_code not in (421, 503):
+                return False
+            # Follow the leader hint, or look for the new leader if the old
+            # one is gone. Retrying a put of the same value is harmless.
+            hint = response.json().get("leader") if response is not None else None
+            if hint and hint != url:
+                leader_url[0] = hint
+                continue
+            time.sleep(0.05)
+            current = find_raft_leader(cluster)
+            if current is not None:
+                leader_url[0] = cluster.urls[current]
+        return False
+
+    result = run_closed_loop(op, config["ops"], config["concurrency"])
+    if "killed_at" in failover:
+        # Time from the crash to the first write committed after it
+        recovered_at = failover.pop("recovered_at", None)
+        killed_at = failover.pop("killed_at")
+        failover["recovery_s"] = round(recovered_at - killed_at, 3) if recovered_at else None
+        result["extra"] = failover
+    return result
+
+def bench_paxos(cluster, config):
+    nodes = len(cluster.urls)
+    paused = nodes - 1 if config["fault"] == "slow-acceptor" and nodes > 1 else None
+    live_urls = [url for i, url in enumerate(cluster.urls) if i != paused]
+
+    # Only use keys whose group leader is up: group leaders are fixed, so
+    # writes to the paused node's groups could not complete at all
+    status = requests.get(f"{live_urls[0]}/status", timeout=5).json()
+    ring = HashRing(status["num_groups"])
+    paused_address = cluster.urls[paused].split('//', 1)[1] if paused is not None else None
+    live_groups = {g["group_id"] for g in status["groups"] if g["leader"] != paused_address}
+    if not live_groups:
+        raise RuntimeError("every Paxos group is led by the paused node")
+    keys, candidates = [], (f"k{j}" for j in itertools.count())
+    while len(keys) < config["ops"]:
+        key = next(candidates)
+        if ring.group_for(key) in live_groups:
+            keys.append(key)
+
+    # Clients spread over the live nodes; non-leaders forward to the key's group leader
+    def op(session, i):
+        url = live_urls[i % len(live_urls)]
+        response = session.post(f"{url}/propose", json={"key": keys[i], "value": payload(config["payload_bytes"], i), "wait": True}, timeout=OP_TIMEOUT)
+        return response.status_code == 200
+
+    if paused is not None:
+        # Let every live group finish Phase 1 first: the fault models a slow
+        # acceptor in steady state, and a Phase-1 quorum of N could never be
+        # gathered while it is paused
+        session = requests.Session()
+        for group in live_groups:
+            key = next(key for key in keys if ring.group_for(key) == group)
+            session.post(f"{live_urls[0]}/propose", json={"key": key, "value": "warm-up", "wait": True}, timeout=OP_TIMEOUT)
+        cluster.pause(paused)
+    result = run_closed_loop(op, config["ops"], config["concurrency"])
+    if paused is not None:
+        cluster.resume(paused)
+        result["extra"] = {"paused": paused, "catch_up_s": paxos_catch_up(cluster, paused)}
+    return result
+
+def paxos_catch_up(cluster, lagging, timeout=15):
+    """Seconds until node `lagging` has applied every slot the other nodes
+    have, or None if it does not get there within `timeout`."""
+    start = time.perf_counter()
+    def caught_up():
+        applied = [
+            {g["group_id"]: g["applied_slot"] for g in requests.get(f"{url}/status", timeout=1).json()["groups"]}
+            for url in cluster.urls
+        ]
+        behind = any(slots[group] > applied[lagging][group] for slots in applied for group in slots)
+        return None if behind else time.perf_counter() - start
+    elapsed = wait_until(caught_up, timeout=timeout, interval=0.1)
+    return round(elapsed, 3) if elapsed is not None else None
+
+def bench_pbft(cluster, config):
+    primary = cluster.urls[0]
+    # Watch a replica that is neither the primary nor a traitor
+    observer = next(url for i, url in enumerate(cluster.urls) if i != 0 and i not in cluster.traitors)
+
+    def op(session, i):
+        value = payload(config["payload_bytes"], i)
+        message = {
+            "client_id": os.getpid(),
+            "timestamp": time.time(),
+            "operation": {"type": "set", "key": f"k{i}", "value": value},
+        }
+        if session.post(f"{primary}/request", json=message, timeout=OP_TIMEOUT).status_code != 202:
+            return False
+        def executed():
+            if session.get(f"{observer}/get", params={"key": f"k{i}"}, timeout=OP_TIMEOUT).json()["value"] == value:
+                return True
+        return bool(wait_until(executed, timeout=OP_TIMEOUT, interval=0.005))
+
+    return run_closed_loop(op, config["ops"], config["concurrency"])
+
+def agreed_leader(cluster):
+    leaders = set()
+    for i, url in enumerate(cluster.urls):
+        if cluster.processes[i] is not None:
+            leaders.add(requests.get(f"{url}/leader", timeout=1).json()["leader_id"])
+    if len(leaders) == 1 and None not in leaders:
+        return leaders.pop()
+
+def stable_leader(cluster, timeout=60):
+    """Waits until every live node names the highest live node id as leader
+    (what the Bully algorithm must converge to) and keeps doing so for a
+    full heartbeat period. A leader that is only agreed on for a moment in
+    the middle of a chain of elections does not count. Returns the seconds
+    until the lasting agreement began (None if it never came) and the leader
+    the nodes last agreed on."""
+    # Node ids are 1-based, process indexes 0-based
+    expected = max(i + 1 for i, process in enumerate(cluster.processes) if process is not None)
+    start = time.perf_counter()
+    agreed_since, current = None, None
+    while time.perf_counter() - start < timeout + ELECTION_HEARTBEAT:
+        try:
+            current = agreed_leader(cluster)
+        except requests.exceptions.RequestException:
+            current = None
+        now = time.perf_counter()
+        if current != expected:
+            agreed_since = None
+            if now - start > timeout:
+                break
+        elif agreed_since is None:
+            agreed_since = now
+        elif now - agreed_since >= ELECTION_HEARTBEAT:
+            return agreed_since - start, current
+        time.sleep(0.05)
+    return None, current
+
+def bench_election(cluster, config):
+    elapsed, leader = stable_leader(cluster)
+    extra = {"leader": leader}
+    if elapsed is not None and config["fault"] == "kill-leader":
+        cluster.kill(leader - 1)
+        elapsed, new_leader = stable_leader(cluster)
+        extra = {"killed_leader": leader, "leader": new_leader}
+    if elapsed is None:
+        # No agreement, or agreement on a node that is not the highest alive
+        result = summarize([], 1, 0)
+    else:
+        result = summarize([elapsed], 0, elapsed)
+    result["throughput_ops_s"] = None
+    result["extra"] = extra
+    return result
+
+def bench_byzantine(cluster, config):
+    def decisions():
+        replies = [requests.get(f"{url}/decision", timeout=1).json() for url in cluster.urls]
+        lieutenants = [r for r in replies if not r["is_commander"]]
+        if all(r["decision"] is not None for r in lieutenants) and replies[0]["orders_sent_at"]:
+            return replies
+
+    replies = wait_until(decisions, timeout=40, interval=0.1)
+    if replies is None:
+        result = summarize([], 1, 0)
+        result["extra"] = {"agreement": False}
+        return result
+
+    sent_at = replies[0]["orders_sent_at"]
+    loyal = [r for r in replies if not r["is_commander"] and not r["is_traitor"]]
+    latencies = [r["decided_at"] - sent_at for r in loyal]
+    result = summarize(latencies, 0, max(latencies) if latencies else 0)
+    result["throughput_ops_s"] = None
+    result["extra"] = {
+        "decisions": {str(r["node_id"]): r["decision"] for r in loyal},
+        # Interactive consistency: all loyal lieutenants agree, and on the
+        # loyal commander's order when the commander is loyal
+        "agreement": len({r["decision"] for r in loyal}) <= 1,
+        "valid": replies[0]["is_traitor"] or all(r["decision"] == "attack" for r in loyal),
+    }
+    return result
+
+WORKLOADS = {
+    'raft': bench_raft,
+    'paxos': bench_paxos,
+    'pbft': bench_pbft,
+    'election': bench_election,
+    'byzantine': bench_byzantine,
+}
+
+
+def traitors_for(fault, nodes):
+    if fault == 'traitor':
+        return {nodes - 1}
+    if fault == 'traitor-commander':
+        return {0}
+    return set()
+
+
+# --- Runner ---
+def run_matrix(args):
+    runs, skipped = [], []
+    base_port = args.base_port
+    for protocol in args.protocols:
+        faults = [f for f in args.faults if f in FAULTS[protocol]] if args.faults else FAULTS[protocol]
+        for nodes in args.sizes:
+            if nodes < MIN_NODES[protocol]:
+                skipped.append({"protocol": protocol, "nodes": nodes, "reason": f"needs at least {MIN_NODES[protocol]} nodes"})
+                continue
+            if protocol in REQUEST_WORKLOADS:
+                shapes = list(itertools.product(args.concurrency, args.payload))
+            else:
+                shapes = [(None, None)]
+            for fault, (concurrency, payload_bytes) in itertools.product(faults, shapes):
+                config = {
+                    "protocol": protocol,
+                    "nodes": nodes,
+                    "concurrency": concurrency,
+                    "payload_bytes": payload_bytes,
+                    "fault": fault,
+                    "ops": args.ops if protocol in REQUEST_WORKLOADS else 1,
+                }
+                print(f"--> {protocol:9} nodes={nodes} concurrency={concurrency} payload={payload_bytes} fault={fault}", flush=True)
+                env = dict(args.env)
+                if protocol == 'byzantine':
+                    env.setdefault('START_DELAY', '2')
+                cluster = Cluster(protocol, nodes, base_port, env, traitors_for(fault, nodes))
+                base_port += nodes
+                try:
+                    cluster.start().wait_ready()
+                    result = WORKLOADS[protocol](cluster, config)
+                except (RuntimeError, TimeoutError) as e:
+                    result = summarize([], 1, 0)
+                    result["error"] = str(e)
+                finally:
+                    cluster.stop()
+                run = dict(config, **result)
+                runs.append(run)
+                print(f"    ok={run['ok']} errors={run['errors']} throughput={run['throughput_ops_s']} ops/s "
+                      f"p50={run['latency_ms']['p50']}ms p99={run['latency_ms']['p99']}ms", flush=True)
+    return runs, skipped
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=REPO_ROOT, text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_key(run):
+    return (run["protocol"], run["nodes"], run["concurrency"], run["payload_bytes"], run["fault"])
+
+def compare(report, baseline, tolerance):
+    """Prints per-run changes against a baseline report and returns the
+    runs whose throughput dropped, or whose p50 latency or failover
+    recovery time grew, by more than `tolerance`."""
+    previous = {run_key(run): run for run in baseline["runs"]}
+    regressions = []
+    for run in report["runs"]:
+        old = previous.get(run_key(run))
+        if old is None:
+            continue
+        for metric, new_value, old_value, worse in (
+            ("throughput_ops_s", run["throughput_ops_s"], old["throughput_ops_s"], lambda n, o: n < o * (1 - tolerance)),
+            ("latency_p50_ms", run["latency_ms"]["p50"], old["latency_ms"]["p50"], lambda n, o: n > o * (1 + tolerance)),
+            ("recovery_s", (run.get("extra") or {}).get("recovery_s"), (old.get("extra") or {}).get("recovery_s"), lambda n, o: n > o * (1 + tolerance)),
+        ):
+            if old_value is None:
+                continue
+            if new_value is None:
+                # The run produced no result where the baseline had one
+                regressed, change = True, "no result"
+            elif old_value == 0:
+                regressed, change = False, "baseline was 0"
+            else:
+                regressed = worse(new_value, old_value)
+                change = f"{(new_value - old_value) / old_value * 100:+.1f}%"
+            print(f"{'REGRESSION' if regressed else 'ok':10} {run_key(run)} {metric}: {old_value} -> {new_value} ({change})")
+            if regressed:
+                regressions.append({"run": list(run_key(run)), "metric": metric, "baseline": old_value, "current": new_value})
+    return regressions
+
+
+def int_list(text):
+    return [int(x) for x in text.split(',') if x]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Cross-protocol throughput and latency benchmarks.")
+    parser.add_argument('--protocols', default=','.join(WORKLOADS), help="comma-separated, from: " + ', '.join(WORKLOADS))
+    parser.add_argument('--sizes', type=int_list, default=[4], help="cluster sizes, e.g. 3,5,7")
+    parser.add_argument('--concurrency', type=int_list, default=[1, 8], help="concurrent clients")
+    parser.add_argument('--payload', type=int_list, default=[16, 1024], help="value sizes in bytes")
+    parser.add_argument('--faults', default=None, help="comma-separated; default is every fault a protocol supports")
+    parser.add_argument('--ops', type=int, default=200, help="operations per run for request workloads")
+    parser.add_argument('--base-port', type=int, default=7000)
+    parser.add_argument('--env', action='append', default=[], help="extra KEY=VALUE passed to every node")
+    parser.add_argument('--output', default=os.path.join(REPO_ROOT, 'bench', 'results'), help="directory for the JSON report")
+    parser.add_argument('--baseline', help="earlier report to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.10, help="allowed relative slowdown before a run counts as a regression")
+    args = parser.parse_args()
+
+    args.protocols = [p for p in args.protocols.split(',') if p]
+    unknown = set(args.protocols) - set(WORKLOADS)
+    if unknown:
+        parser.error(f"unknown protocols: {', '.join(sorted(unknown))}")
+    args.faults = [f for f in args.faults.split(',') if f] if args.faults else None
+    args.env = parse_env(args.env)
+
+    started_at = time.strftime('%Y-%m-%dT%H:%M:%S%z')
+    runs, skipped = run_matrix(args)
+    report = {
+        "schema_version": 1,
+        "started_at": started_at,
+        "git_commit": git_commit(),
+        "host": {
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+        },
+        "parameters": {
+            "protocols": args.protocols,
+            "sizes": args.sizes,
+            "concurrency": args.concurrency,
+            "payload_bytes": args.payload,
+            "faults": args.faults,
+            "ops": args.ops,
+            "env": args.env,
+        },
+        "runs": runs,
+        "skipped": skipped,
+    }
+
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            report["regressions"] = compare(report, json.load(f), args.tolerance)
+        exit_code = 1 if report["regressions"] else 0
+
+    os.makedirs(args.output, exist_ok=True)
+    path = os.path.join(args.output, f"bench-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Report written to {path}")
+    sys.exit(exit_code)
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+# cluster.py
+# Starts N nodes of any protocol in this repo as local processes on loopback
+# ports, with peers wired up by the launcher instead of docker-compose:
+#
+#   python bench/cluster.py raft -n 5 --base-port 7000
+#   python bench/cluster.py paxos -n 3 --env PHASE1_QUORUM=3 --env PHASE2_QUORUM=1
+
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import time
+import requests
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HOST = '127.0.0.1'
+
+
+def _others(urls, i):
+    return [url for j, url in enumerate(urls) if j != i]
+
+
+def paxos_node(i, ports, traitors):
+    addresses = [f"{HOST}:{port}" for port in ports]
+    env = {
+        'NODE_ID': f"paxos-node-{i + 1}",
+        'PEERS': ','.join(addresses),
+        'SELF_ADDRESS': addresses[i],
+        'FLASK_APP': 'app',
+    }
+    cmd = [sys.executable, '-m', 'flask', 'run', '--host', HOST, '--port', str(ports[i])]
+    return cmd, env
+
+def raft_node(i, ports, traitors):
+    urls = [f"http://{HOST}:{port}" for port in ports]
+    env = {'NODE_ID': str(i + 1), 'PORT': str(ports[i]), 'SELF_URL': urls[i]}
+    return [sys.executable, 'raft_node.py', *_others(urls, i)], env
+
+def pbft_node(i, ports, traitors):
+    urls = [f"http://{HOST}:{port}" for port in ports]
+    env = {
+        'NODE_ID': str(i),
+        'PORT': str(ports[i]),
+        'IS_PRIMARY': str(i == 0).lower(),
+        'IS_TRAITOR': str(i in traitors).lower(),
+    }
+    return [sys.executable, 'pbft_node.py', *_others(urls, i)], env
+
+def election_node(i, ports, traitors):
+    env = {
+        'NODE_ID': str(i + 1),
+        'PORT': str(ports[i]),
+        'ALL_NODES': ','.join(str(j + 1) for j in range(len(ports))),
+        'NODE_ADDRESSES': ','.join(f"{j + 1}={HOST}:{port}" for j, port in enumerate(ports)),
+    }
+    return [sys.executable, 'node.py'], env
+
+def byzantine_node(i, ports, traitors):
+    urls = [f"http://{HOST}:{port}" for port in ports]
+    env = {
+        'NODE_ID': str(i),
+        'PORT': str(ports[i]),
+        'IS_COMMANDER': str(i == 0).lower(),
+        'IS_TRAITOR': str(i in traitors).lower(),
+        'ORDER': 'attack',
+        'COMMANDER_URL': urls[0],
+    }
+    return [sys.executable, 'node.py', *_others(urls, i)], env
+
+
+# name -> (module directory, node builder, endpoint that answers once the node is up)
+PROTOCOLS = {
+    'paxos': ('Paxos', paxos_node, '/status'),
+    'raft': ('Consensus with Raft', raft_node, '/status'),
+    'pbft': ('Practical Byzantine Fault Tolerance (PBFT)', pbft_node, '/status'),
+    'election': ('Process Coordination & Leader Election', election_node, '/leader'),
+    'byzantine': ('Simulating the Byzantine Generals Problem', byzantine_node, '/decision'),
+}
+
+
+class Cluster:
+    """N local processes of one protocol. Usable as a context manager."""
+
+    def __init__(self, protocol, nodes, base_port=7000, env=None, traitors=(), log_dir=None):
+        if protocol not in PROTOCOLS:
+            raise ValueError(f"Unknown protocol '{protocol}', expected one of {sorted(PROTOCOLS)}")
+        self.protocol = protocol
+        self.directory, self.builder, self.ready_path = PROTOCOLS[protocol]
+        self.ports = [base_port + i for i in range(nodes)]
+        self.urls = [f"http://{HOST}:{port}" for port in self.ports]
+        self.env = dict(env or {})
+        self.traitors = set(traitors)
+        self.log_dir = log_dir or os.path.join(REPO_ROOT, 'bench', 'logs')
+        self.processes = [None] * nodes
+        self.paused = set()
+        self._logs = [None] * nodes
+
+    def start(self):
+        os.makedirs(self.log_dir, exist_ok=True)
+        for i in range(len(self.ports)):
+            self.start_node(i)
+        return self
+
+    def start_node(self, i):
+        cmd, node_env = self.builder(i, self.ports, self.traitors)
+        env = dict(os.environ, PYTHONUNBUFFERED='1', **node_env, **self.env)
+        log_path = os.path.join(self.log_dir, f"{self.protocol}-node{i}.log")
+        self._logs[i] = open(log_path, 'w')
+        self.processes[i] = subprocess.Popen(
+            cmd, cwd=os.path.join(REPO_ROOT, self.directory), env=env,
+            stdout=self._logs[i], stderr=subprocess.STDOUT,
+        )
+
+    def wait_ready(self, timeout=30):
+        """Blocks until every live node answers HTTP on its ready endpoint."""
+        deadline = time.monotonic() + timeout
+        for i, url in enumerate(self.urls):
+            while self.processes[i] is not None:
+                if self.processes[i].poll() is not None:
+                    raise RuntimeError(f"{self.protocol} node {i} exited with code {self.processes[i].returncode}, see {self._logs[i].name}")
+                try:
+                    requests.get(f"{url}{self.ready_path}", timeout=1)
+                    break
+                except requests.exceptions.RequestException:
+                    if time.monotonic() > deadline:
+                        raise TimeoutError(f"{self.protocol} node {i} at {url} did not come up within {timeout}s")
+                    time.sleep(0.1)
+        return self
+
+    def kill(self, i):
+        """Crash-stops node i (SIGKILL), to inject a fault."""
+        process = self.processes[i]
+        if process is not None:
+            process.kill()
+            process.wait()
+            self.processes[i] = None
+            self.paused.discard(i)
+
+    def pause(self, i):
+        """Freezes node i (SIGSTOP) without closing its sockets, so peers see
+        a node that has stopped answering rather than one that has crashed."""
+        process = self.processes[i]
+        if process is not None:
+            process.send_signal(signal.SIGSTOP)
+            self.paused.add(i)
+
+    def resume(self, i):
+        """Lets a paused node run again (SIGCONT)."""
+        process = self.processes[i]
+        if process is not None and i in self.paused:
+            process.send_signal(signal.SIGCONT)
+        self.paused.discard(i)
+
+    def stop(self):
+        # A stopped process would not act on SIGTERM until continued
+        for i in list(self.paused):
+            self.resume(i)
+        for i in range(len(self.processes)):
+            process = self.processes[i]
+            if process is not None:
+                process.terminate()
+        for i, process in enumerate(self.processes):
+            if process is not None:
+                try:
+                    process.wait(timeout=5)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+                    process.wait()
+                self.processes[i] = None
+            if self._logs[i] is not None:
+                self._logs[i].close()
+                self._logs[i] = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def parse_env(pairs):
+    env = {}
+    for pair in pairs:
+        key, _, value = pair.partition('=')
+        env[key] = value
+    return env
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Start a local, Docker-free cluster.")
+    parser.add_argument('protocol', choices=sorted(PROTOCOLS))
+    parser.add_argument('-n', '--nodes', type=int, default=3)
+    parser.add_argument('--base-port', type=int, default=7000)
+    parser.add_argument('--traitor', type=int, action='append', default=[], help="node index to run as a traitor (pbft, byzantine)")
+    parser.add_argument('--env', action='append', default=[], help="extra KEY=VALUE passed to every node")
+    args = parser.parse_args()
+
+    cluster = Cluster(args.protocol, args.nodes, args.base_port, parse_env(args.env), args.traitor)
+    try:
+        cluster.start().wait_ready()
+        print(f"{args.protocol} cluster up: {' '.join(cluster.urls)}")
+        print(f"Logs in {cluster.log_dir}. Press Ctrl+C to stop.")
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        cluster.stop()